@@ -46,6 +46,12 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument(
         "--orders-pattern", default="orders*.csv", help="Glob pattern for orders files"
     )
+    p.add_argument(
+        "--no-source",
+        dest="keep_source",
+        action="store_false",
+        help="Leave out the _source column naming each order's input file",
+    )
     p.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging")
     return p
 
@@ -69,6 +75,7 @@ def main():
         output_format=args.output_format,
         sqlite_db_name=args.sqlite_name,
         orders_pattern=args.orders_pattern,
+        keep_source=args.keep_source,
     )
 
     logger.info("ETL config: %s", config)
@@ -82,6 +89,7 @@ def main():
         output_format=config.output_format,
         sqlite_db_name=config.sqlite_db_name,
         orders_pattern=config.orders_pattern,
+        keep_source=config.keep_source,
     )
 
     logger.info("Output: %s", result)
@@ -14,3 +14,4 @@ class ETLConfig:
     output_format: Literal["parquet", "sqlite"] = "parquet"
     sqlite_db_name: str = "quickshop_etl.db"
     orders_pattern: str = "orders*.csv"
+    keep_source: bool = True
@@ -10,65 +10,163 @@ Behavior:
 - Write output to Parquet or SQLite
 """
 
+import fnmatch
+import functools
 import logging
+import os
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 from .exception import ETLError, ValidationError
-from .io import read_csv, write_parquet, write_sqlite
+from .io import (
+    ARROW_TYPES,
+    read_csv,
+    read_csv_files,
+    scan_csv_batches,
+    to_pandas,
+    write_parquet_batches,
+    write_sqlite,
+)
 
 logger = logging.getLogger(__name__)
 
 
 # ---- Schemas ----
 PRODUCTS_SCHEMA: Dict[str, str] = {
-    "product_id": "int",
+    "product_id": "int32",
     "product_name": "str",
     "category": "str",
     "price": "float",
 }
 
 INVENTORY_SCHEMA: Dict[str, str] = {
-    "product_id": "int",
+    "product_id": "int32",
     "warehouse_id": "str",
     "stock_on_hand": "int",
     "last_restock_date": "date",
 }
 
 # NOTE: order_total is not an input column — we compute it later.
+# Order ints have fixed widths, so every streamed batch parses to one schema.
 ORDERS_SCHEMA: Dict[str, str] = {
-    "order_id": "int",
+    "order_id": "int32",
     "order_date": "date",
-    "user_id": "int",
-    "product_id": "int",
-    "qty": "int",
+    "user_id": "int32",
+    "product_id": "int32",
+    "qty": "int16",
     "unit_price": "float",
-    "order_status": "str",
+    "order_status": "category",
 }
 
 
 # ---- Validation helpers ----
-def _ensure_columns(df: pd.DataFrame, schema: Dict[str, str], name: str) -> None:
-    missing = [c for c in schema.keys() if c not in df.columns]
+def _missing_columns(name: str, missing: List[str]) -> ValidationError:
+    return ValidationError(f"[{name}] missing columns: {', '.join(missing)}")
+
+
+def _ensure_columns(columns: Iterable[str], schema: Dict[str, str], name: str) -> None:
+    present = set(columns)
+    missing = [c for c in schema.keys() if c not in present]
     if missing:
-        raise ValidationError(f"[{name}] missing columns: {', '.join(missing)}")
+        raise _missing_columns(name, missing)
+
+
+# fixed-width int schema types; missing values make them nullable ("Int16", ...)
+_FIXED_INTS = {"int16": np.dtype(np.int16), "int32": np.dtype(np.int32)}
+
+
+def _dtype_matches(dtype, target: str) -> bool:
+    """True if a column of `dtype` is already what _cast_series would return."""
+    if target == "int":
+        # compact (already downcast) NumPy ints, or nullable Int64
+        return (
+            isinstance(dtype, np.dtype) and dtype.kind in "iu" and dtype.itemsize < 8
+        ) or dtype == "Int64"
+    if target in _FIXED_INTS:
+        return dtype == _FIXED_INTS[target] or dtype == target.capitalize()
+    if target == "float":
+        return dtype == np.float64
+    if target == "date":
+        return pd.api.types.is_datetime64_any_dtype(dtype)
+    if target == "category":
+        return isinstance(dtype, pd.CategoricalDtype)
+    if target == "str":
+        return _is_arrow_string(dtype)
+    return True
+
+
+def _is_arrow_string(dtype) -> bool:
+    # pandas' own Arrow-backed strings ("str" / "string[pyarrow]") or ArrowDtype
+    if isinstance(dtype, pd.StringDtype):
+        return dtype.storage == "pyarrow"
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(
+            dtype.pyarrow_dtype
+        )
+    return False
+
+
+def _to_numeric(series: pd.Series, target: str) -> pd.Series:
+    """
+    pd.to_numeric, except that text columns are parsed by Arrow's C++ cast
+    kernel. Anything Arrow rejects goes through pandas, which either copes
+    (e.g. padded or exponent notation) or raises the usual error.
+    """
+    if pd.api.types.is_string_dtype(series.dtype):
+        try:
+            parsed = pa.array(series, from_pandas=True).cast(ARROW_TYPES[target])
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass
+        else:
+            # positional: the Arrow result knows nothing of series.index
+            return parsed.to_pandas().set_axis(series.index).rename(series.name)
+    return pd.to_numeric(series, errors="raise")
 
 
 def _cast_series(series: pd.Series, target: str, col_label: str) -> pd.Series:
     try:
         if target == "int":
-            return pd.to_numeric(series, errors="raise").astype("Int64")
+            values = _to_numeric(series, target)
+            if not values.isna().any():
+                # smallest integer dtype that fits — fewer bytes on every write
+                values = pd.to_numeric(values, downcast="integer")
+                if pd.api.types.is_integer_dtype(values):
+                    return values
+            # nullable Int64 keeps missing values (and rejects fractions)
+            return values.astype("Int64")
+        if target in _FIXED_INTS:
+            # fixed width (e.g. the product_id join key): same dtype in every frame
+            values = _to_numeric(series, target).astype(target.capitalize())
+            return values if values.isna().any() else values.astype(_FIXED_INTS[target])
         if target == "float":
-            return pd.to_numeric(series, errors="raise").astype(float)
+            return _to_numeric(series, target).astype(float)
         if target == "date":
             # keep pandas datetime64[ns] for easier filtering later
-            return pd.to_datetime(series, errors="raise")
+            if pd.api.types.is_datetime64_any_dtype(series):
+                return series
+            try:
+                # fixed format: a C parse loop, no per-row format guessing
+                return pd.to_datetime(
+                    series, format="%Y-%m-%d", errors="raise", cache=True
+                )
+            except ValueError:
+                # timestamps with a time part, still ISO 8601
+                return pd.to_datetime(
+                    series, format="ISO8601", errors="raise", cache=True
+                )
+        if target == "category":
+            # low-cardinality text: int codes + a small dictionary of values
+            return series.astype("category")
         if target == "str":
-            return series.astype(str)
+            # Arrow-backed: one contiguous UTF-8 buffer, not a PyObject per row
+            return series.astype("string[pyarrow]")
         return series
     except Exception as exc:
         raise ValidationError(
@@ -80,14 +178,34 @@ def validate_dataframe(
     df: pd.DataFrame, schema: Dict[str, str], name: str
 ) -> pd.DataFrame:
     """
-    Validate presence of required columns and coerce types.
-    Returns a new DataFrame with coerced dtypes (or raises
-    ValidationError).
+    Validate presence of required columns and coerce types, or raise
+    ValidationError. Returns df itself when nothing needs coercing.
     """
-    _ensure_columns(df, schema, name)
-    out = df.copy()
+    missing: List[str] = []
+    coerced: Dict[str, pd.Series] = {}
+    error: Optional[ValidationError] = None
     for col, typ in schema.items():
-        out[col] = _cast_series(out[col], typ, f"{name}.{col}")
+        if col not in df.columns:
+            missing.append(col)
+            continue
+        series = df[col]
+        if error is not None or _dtype_matches(series.dtype, typ):
+            continue
+        try:
+            coerced[col] = _cast_series(series, typ, f"{name}.{col}")
+        except ValidationError as exc:
+            # keep sweeping (cheaply) in case a column is missing
+            error = exc
+    if missing:
+        raise _missing_columns(name, missing)
+    if error is not None:
+        raise error
+    if not coerced:
+        return df
+    # shallow copy + column replacement: other columns are shared, not copied
+    out = df.copy(deep=False)
+    for col, series in coerced.items():
+        out[col] = series
     return out
 
 
@@ -104,17 +222,66 @@ def validate_orders(df: pd.DataFrame) -> pd.DataFrame:
     return validate_dataframe(df, ORDERS_SCHEMA, "orders")
 
 
+# ---- Reference data cache ----
+_REFERENCE_SCHEMAS: Dict[str, Dict[str, str]] = {
+    "products": PRODUCTS_SCHEMA,
+    "inventory": INVENTORY_SCHEMA,
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _read_and_validate(
+    path: str, mtime_ns: int, size: int, schema_name: str
+) -> pd.DataFrame:
+    # mtime_ns and size only key the cache: an edited file misses it
+    schema = _REFERENCE_SCHEMAS[schema_name]
+    return validate_dataframe(read_csv(Path(path), schema=schema), schema, schema_name)
+
+
+def load_reference(path: Path, schema_name: str) -> pd.DataFrame:
+    """
+    Read and validate a reference file ("products" or "inventory"),
+    reusing the result of earlier calls while the file is unchanged.
+
+    Callers get their own copy of the cached frame, so changes they make
+    never leak into the cache. The copy is a memcpy; the parse and
+    validation it replaces are far slower.
+    """
+    stat = Path(path).stat()
+    cached = _read_and_validate(str(path), stat.st_mtime_ns, stat.st_size, schema_name)
+    return cached.copy()
+
+
 # ---- File discovery ----
 def _discover_order_files(data_dir: Path, pattern: str) -> List[Path]:
     """
     Return a sorted list of Path objects matching the glob pattern
-    inside data_dir. Uses Path.glob for consistent pathlib behavior.
+    inside data_dir.
+
+    Flat patterns are matched with one os.scandir pass: the literal
+    prefix of the pattern is checked first and only those names go
+    through the compiled glob. Patterns with a directory part fall back
+    to Path.glob.
     """
-    files = sorted(data_dir.glob(pattern))
+    if "/" in pattern or os.sep in pattern:
+        files = sorted(data_dir.glob(pattern))
+    else:
+        prefix = re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+        match = re.compile(fnmatch.translate(pattern)).match
+        with os.scandir(data_dir) as entries:
+            files = sorted(
+                Path(e.path)
+                for e in entries
+                if e.name.startswith(prefix) and match(e.name)
+            )
     logger.debug("discovered %d order files using pattern %s", len(files), pattern)
     return files
 
 
+_FILENAME_DATE_RE = re.compile(r"(\d{8})")
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
 def _filter_files_by_filename_date(
     files: List[Path],
     start: Optional[datetime],
@@ -124,45 +291,139 @@ def _filter_files_by_filename_date(
     Keep only files whose filename includes an 8-digit YYYYMMDD date
     inside the requested window. If a file doesn't include a date, we
     keep it (conservative choice).
+
+    Dates are compared as YYYYMMDD integers in one vectorized pass
+    rather than strptime-ing every filename.
     """
     if not start and not end:
         return files
 
-    filtered: List[Path] = []
-    for p in files:
-        m = re.search(r"(\d{8})", p.stem)
-        if not m:
-            # filename does not contain a date; include by default
-            filtered.append(p)
-            continue
-
-        try:
-            file_dt = datetime.strptime(m.group(1), "%Y%m%d")
-        except ValueError:
-            # invalid date token in filename — skip it
-            logger.debug("skipping file with invalid date token: %s", p.name)
-            continue
+    # -1 marks "no date token in the filename"
+    dates = np.fromiter(
+        (
+            int(m.group(1)) if (m := _FILENAME_DATE_RE.search(p.stem)) else -1
+            for p in files
+        ),
+        dtype=np.int32,
+        count=len(files),
+    )
+    year = dates // 10000
+    month = dates // 100 % 100
+    day = dates % 100
+    # real calendar dates only (same as strptime): days-in-month, leap Februaries
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = _DAYS_IN_MONTH[np.clip(month, 1, 12) - 1] + (leap & (month == 2))
+    valid = (
+        (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+    )
+    n_invalid = int((~valid & (dates != -1)).sum())
+    if n_invalid:
+        # invalid date token in filename — skip those files
+        logger.debug("skipping %d files with invalid date tokens", n_invalid)
 
-        if start and file_dt < start:
-            continue
-        if end and file_dt > end:
-            continue
-        filtered.append(p)
+    lo = int(start.strftime("%Y%m%d")) if start else 0
+    hi = int(end.strftime("%Y%m%d")) if end else 99999999
+    keep = (dates == -1) | (valid & (dates >= lo) & (dates <= hi))
 
+    filtered = [p for p, k in zip(files, keep) if k]
     logger.debug("after filename-date filter: %d files remain", len(filtered))
     return filtered
 
 
+def _order_date_filter(
+    start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]
+) -> Optional[pc.Expression]:
+    """Arrow scan predicate for start <= order_date <= end (end inclusive as a day)."""
+    ts = pa.timestamp("ns")
+    bounds = []
+    if start is not None:
+        bounds.append(pc.field("order_date") >= pa.scalar(start, type=ts))
+    if end is not None:
+        # treat end_date as inclusive end of day
+        bounds.append(
+            pc.field("order_date") < pa.scalar(end + pd.Timedelta(days=1), type=ts)
+        )
+    if not bounds:
+        return None
+    return bounds[0] if len(bounds) == 1 else bounds[0] & bounds[1]
+
+
 # ---- Transform / Enrich ----
-def _compute_order_totals(orders: pd.DataFrame) -> pd.DataFrame:
-    # ensure numeric before multiplication
-    orders = orders.copy()
-    orders["qty"] = pd.to_numeric(orders["qty"], errors="raise").astype(float)
-    orders["unit_price"] = pd.to_numeric(orders["unit_price"], errors="raise").astype(
-        float
+def _as_ndarray(series: pd.Series) -> np.ndarray:
+    # NumPy-backed columns come back as views; nullable ones as float + NaN
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return series.to_numpy()
+
+
+def _numeric_ndarray(series: pd.Series) -> np.ndarray:
+    # validated columns are numeric already; only raw input needs parsing
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors="raise")
+    return _as_ndarray(series)
+
+
+def _multiply_round(qty: np.ndarray, unit_price: np.ndarray) -> np.ndarray:
+    # one output buffer: multiply into it, then round it in place
+    total = np.multiply(qty, unit_price, dtype=np.float64)
+    np.round(total, 2, out=total)
+    return total
+
+
+def _order_totals(orders: pd.DataFrame) -> np.ndarray:
+    return _multiply_round(
+        _numeric_ndarray(orders["qty"]), _numeric_ndarray(orders["unit_price"])
     )
-    orders["order_total"] = (orders["qty"] * orders["unit_price"]).round(2)
-    return orders
+
+
+def _is_completed(status: pd.Series) -> np.ndarray:
+    """Case-insensitive status == "completed" on the Arrow string buffer."""
+    if isinstance(status.dtype, pd.CategoricalDtype):
+        # compare the handful of categories once, then look rows up by code
+        # (the appended False is what code -1, a missing status, picks)
+        cats = status.cat.categories
+        hits = _is_completed(cats.to_series()) if len(cats) else np.zeros(0, bool)
+        return np.append(hits, False)[status.cat.codes.to_numpy()]
+    lowered = pc.utf8_lower(pa.array(status, from_pandas=True))
+    return pc.fill_null(pc.equal(lowered, "completed"), False).to_numpy(
+        zero_copy_only=False
+    )
+
+
+def index_by_product_id(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lookup form of products/inventory: first row per product_id, indexed
+    by product_id. Frames already indexed by product_id only lose repeated
+    ids, so callers can build the lookups once and reuse them across
+    enrich calls.
+    """
+    if df.index.name == "product_id":
+        # a caller-built lookup may repeat ids; reindex needs unique labels
+        return df[~df.index.duplicated()] if df.index.has_duplicates else df
+    return df.drop_duplicates(subset=["product_id"]).set_index("product_id")
+
+
+# enriched orders lead with these columns; any others follow
+_LEADING_COLUMNS = [
+    "order_id",
+    "order_date",
+    "user_id",
+    "order_status",
+    "product_id",
+    "product_name",
+    "category",
+    "qty",
+    "unit_price",
+    "order_total",
+    "stock_on_hand",
+]
+
+
+def _output_order(columns: Iterable[str]) -> List[str]:
+    # keep columns in a friendly order
+    columns = list(columns)
+    ordered = [c for c in _LEADING_COLUMNS if c in columns]
+    return ordered + [c for c in columns if c not in ordered]
 
 
 def enrich_orders(
@@ -171,54 +432,112 @@ def enrich_orders(
     """
     Calculate order_total, keep only completed orders, and enrich with
     product and inventory data. Returns a new DataFrame.
+
+    products/inventory may be plain frames or already passed through
+    index_by_product_id.
     """
     if orders.empty:
         return orders.copy()
 
-    df = _compute_order_totals(orders)
-
     # keep only completed orders (case-insensitive)
-    before = len(df)
-    df = df[df["order_status"].str.lower() == "completed"].copy()
+    before = len(orders)
+    df = orders[_is_completed(orders["order_status"])]
     logger.debug("filtered completed orders: %d -> %d", before, len(df))
 
-    # left-join product metadata
-    prod_cols = ["product_id", "product_name", "category"]
-    df = df.merge(
-        products[prod_cols].drop_duplicates(subset=["product_id"]),
-        on="product_id",
-        how="left",
-        validate="m:1",
+    # left-join product metadata and current stock_on_hand: hash product_id
+    # once (factorize), look up only the distinct ids, then gather per row
+    # by code — no merge planning, m:1 check or repeated hashing
+    prod = index_by_product_id(products)
+    inv = index_by_product_id(inventory)
+    codes, uniques = pd.factorize(df["product_id"], sort=False)
+    prod_rows = prod[["product_name", "category"]].reindex(uniques)
+    stock = inv["stock_on_hand"].reindex(uniques)
+
+    def gather(column: pd.Series):
+        # take() wants a plain ndarray or a real ExtensionArray, not the
+        # NumpyExtensionArray that .array gives for NumPy-backed columns
+        if isinstance(column.dtype, pd.api.extensions.ExtensionDtype):
+            values = column.array
+        else:
+            values = column.to_numpy()
+        # code -1 (missing product_id) becomes a missing value
+        return pd.api.extensions.take(values, codes, allow_fill=True)
+
+    columns = dict(df.items())
+    columns.update(
+        order_total=_order_totals(df),
+        product_name=gather(prod_rows["product_name"]),
+        # few distinct categories: categorical is much smaller and groups faster
+        category=gather(prod_rows["category"].astype("category")),
+        stock_on_hand=gather(stock),
     )
-
-    # left-join inventory (bring current stock_on_hand)
-    inv_cols = ["product_id", "stock_on_hand"]
-    df = df.merge(
-        inventory[inv_cols].drop_duplicates(subset=["product_id"]),
-        on="product_id",
-        how="left",
-        validate="m:1",
+    # the completed-orders filter made the one copy of the order columns;
+    # assign and column selection would copy them again on pandas 2.x
+    # (no copy-on-write), so the result is built around them, in order
+    return pd.DataFrame({c: columns[c] for c in _output_order(columns)}, copy=False)
+
+
+def _enriched_schema(scanned: pa.Schema, inventory: pd.DataFrame) -> pa.Schema:
+    """Arrow schema of enrich_orders output for orders scanned as `scanned`."""
+    fields = {f.name: f for f in scanned}
+    types = {col: ARROW_TYPES[typ] for col, typ in ORDERS_SCHEMA.items()}
+    types.update(
+        order_total=pa.float64(),
+        product_name=ARROW_TYPES["str"],
+        category=ARROW_TYPES["category"],
+        stock_on_hand=pa.array(inventory["stock_on_hand"]).type,
     )
+    fields.update((col, pa.field(col, typ)) for col, typ in types.items())
+    return pa.schema([fields[c] for c in _output_order(fields)])
+
+
+def _enriched_tables(
+    batches: Iterable[pa.RecordBatch],
+    schema: pa.Schema,
+    products: pd.DataFrame,
+    inventory: pd.DataFrame,
+) -> Iterator[pa.Table]:
+    """validate_orders + enrich_orders for each batch, as Arrow tables of `schema`."""
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        orders = validate_orders(to_pandas(pa.Table.from_batches([batch])))
+        enriched = enrich_orders(orders, products, inventory)
+        if len(enriched):
+            yield pa.Table.from_pandas(enriched, preserve_index=False).cast(schema)
 
-    # keep columns in a friendly order
-    ordered = [
-        "order_id",
-        "order_date",
-        "user_id",
-        "order_status",
-        "product_id",
-        "product_name",
-        "category",
-        "qty",
-        "unit_price",
-        "order_total",
-        "stock_on_hand",
-    ]
-    ordered = [c for c in ordered if c in df.columns]
-    others = [c for c in df.columns if c not in ordered]
-    df = df[ordered + others]
-
-    return df
+
+def _stream_to_parquet(
+    files: List[Path],
+    out_path: Path,
+    products: pd.DataFrame,
+    inventory: pd.DataFrame,
+    source_column: Optional[str],
+    row_filter: Optional[pc.Expression],
+    ints_as_text: bool,
+) -> int:
+    """Validate, enrich and write orders to out_path batch by batch; returns rows."""
+    # Stream: each scanned batch (typed by Arrow at parse time, order_date
+    # range applied inside the scan) is validated, enriched and written
+    # before the next one is read, so the orders are never all in memory
+    # at once
+    schema, batches = scan_csv_batches(
+        files,
+        schema=ORDERS_SCHEMA,
+        source_column=source_column,
+        row_filter=row_filter,
+        ints_as_text=ints_as_text,
+    )
+    _ensure_columns(schema.names, ORDERS_SCHEMA, "orders")
+    out_schema = _enriched_schema(schema, inventory)
+    # one row group per category (per batch): category filters prune
+    # by statistics
+    return write_parquet_batches(
+        _enriched_tables(batches, out_schema, products, inventory),
+        out_path,
+        schema=out_schema,
+        group_by="category",
+    )
 
 
 # ---- Runner ----
@@ -230,10 +549,18 @@ def run_etl(
     output_format: str = "parquet",
     sqlite_db_name: str = "quickshop_etl.db",
     orders_pattern: str = "orders*.csv",
+    keep_source: bool = True,
 ) -> Path:
     """
     Orchestrate the ETL run. Returns the path to the created artifact
     (parquet file or sqlite DB).
+
+    Both formats hold the same rows with the same validated types. SQLite
+    keeps the rows in file order. Parquet rows are grouped by category
+    (one row group per category), so their order differs.
+
+    With keep_source, each order row carries the name of the file it came
+    from in a `_source` column.
     """
     logger.info("starting ETL run; input=%s output=%s", input_dir, output_dir)
 
@@ -249,8 +576,9 @@ def run_etl(
     if not products_path.exists() or not inventory_path.exists():
         raise ETLError(f"products.csv or inventory.csv not found in {input_dir}")
 
-    products_raw = read_csv(products_path)
-    inventory_raw = read_csv(inventory_path)
+    # validated once per file version, then served from the cache
+    products = load_reference(products_path, "products")
+    inventory = load_reference(inventory_path, "inventory")
 
     # Discover order files and optionally filter by filename date token
     all_order_files = _discover_order_files(Path(input_dir), orders_pattern)
@@ -258,35 +586,8 @@ def run_etl(
     if not files_to_use:
         raise ETLError("no order files found for the requested range")
 
-    # Read and concatenate order CSVs
-    frames = []
-    for p in files_to_use:
-        logger.debug("reading orders file: %s", p.name)
-        df = read_csv(p)
-        df["_source"] = p.name
-        frames.append(df)
-
-    orders_raw = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
-
-    # Validate and coerce schemas
-    products = validate_products(products_raw)
-    inventory = validate_inventory(inventory_raw)
-    orders = validate_orders(orders_raw)
-
-    # Filter by order_date column if start/end provided
-    if start_date is not None:
-        orders = orders[orders["order_date"] >= start_date]
-    if end_date is not None:
-        # treat end_date as inclusive end of day
-        orders = orders[
-            orders["order_date"]
-            <= end_date + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
-        ]
-
-    # Transform & enrich
-    enriched = enrich_orders(orders, products, inventory)
-
-    # Write output
+    row_filter = _order_date_filter(start_date, end_date)
+    source_column = "_source" if keep_source else None
     out_dir = Path(output_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -301,11 +602,50 @@ def run_etl(
         else:
             fname = f"orders_{pd.Timestamp.now():%Y%m%d_%H%M%S}.parquet"
         out_path = out_dir / fname
-        write_parquet(enriched, out_path)
-        logger.info("wrote parquet: %s", out_path)
+
+        # build the product_id lookups once and reuse them for every batch
+        prod = index_by_product_id(products)
+        inv = index_by_product_id(inventory)
+        stream = functools.partial(
+            _stream_to_parquet,
+            files_to_use,
+            out_path,
+            prod,
+            inv,
+            source_column,
+            row_filter,
+        )
+        try:
+            rows = stream(ints_as_text=False)
+        except ValidationError:
+            # e.g. ints written as "2.0", which Arrow won't parse as ints but
+            # validation accepts: read them as text and let validation parse
+            rows = stream(ints_as_text=True)
+        logger.info("wrote parquet: %s (%d rows)", out_path, rows)
         return out_path
 
     elif output_format == "sqlite":
+        # Scan all order CSVs as one Arrow dataset (parsed in parallel), with
+        # the order_date range applied inside the scan, then convert to pandas
+        # once
+        orders_raw = to_pandas(
+            read_csv_files(
+                files_to_use,
+                schema=ORDERS_SCHEMA,
+                source_column=source_column,
+                row_filter=row_filter,
+            )
+        )
+
+        # Validate and coerce schemas
+        orders = validate_orders(orders_raw)
+
+        # Transform & enrich
+        # build the product_id lookups once, up front
+        enriched = enrich_orders(
+            orders, index_by_product_id(products), index_by_product_id(inventory)
+        )
+
         db_path = out_dir / sqlite_db_name
         # write_sqlite in io.py accepts if_exists argument now
         write_sqlite(products, db_path, "products", if_exists="replace")
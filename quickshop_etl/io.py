@@ -1,22 +1,354 @@
 import logging
 import sqlite3
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .exception import ValidationError
 
 log = logging.getLogger(__name__)
 
 
-def read_csv(path: Path, **kwargs) -> pd.DataFrame:
-    """Just a thin wrapper so we can log and reuse."""
+# schema type names (see etl.py) -> Arrow types enforced while parsing
+ARROW_TYPES: Dict[str, pa.DataType] = {
+    "int": pa.int64(),
+    "int16": pa.int16(),
+    "int32": pa.int32(),
+    "float": pa.float64(),
+    "date": pa.timestamp("ns"),
+    "str": pa.string(),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+}
+
+
+def _smallest_int(lo: Optional[int], hi: Optional[int]) -> pa.DataType:
+    """Narrowest signed int holding lo..hi, as pd.to_numeric(downcast="integer")."""
+    for typ in (pa.int8(), pa.int16(), pa.int32()):
+        info = np.iinfo(typ.to_pandas_dtype())
+        if (lo is None or lo >= info.min) and (hi is None or hi <= info.max):
+            return typ
+    return pa.int64()
+
+
+def _int_column_types(
+    batches: Iterable[pa.RecordBatch], columns: List[str]
+) -> Dict[str, pa.DataType]:
+    """Smallest int type per column over all batches; int64 if any value is missing."""
+    lo: Dict[str, Optional[int]] = dict.fromkeys(columns)
+    hi: Dict[str, Optional[int]] = dict.fromkeys(columns)
+    nulls = dict.fromkeys(columns, 0)
+    for batch in batches:
+        for col in columns:
+            values = batch.column(col)
+            nulls[col] += values.null_count
+            bounds = pc.min_max(values)
+            low, high = bounds["min"].as_py(), bounds["max"].as_py()
+            if low is not None:
+                lo[col] = low if lo[col] is None else min(lo[col], low)
+                hi[col] = high if hi[col] is None else max(hi[col], high)
+    return {
+        col: pa.int64() if nulls[col] else _smallest_int(lo[col], hi[col])
+        for col in columns
+    }
+
+
+def downcast_ints(table: pa.Table, schema: Optional[Dict[str, str]]) -> pa.Table:
+    """Cast the schema's "int" columns to the width validation downcasts them to."""
+    columns = [
+        c
+        for c, t in (schema or {}).items()
+        if t == "int"
+        and c in table.column_names
+        and pa.types.is_integer(table.schema.field(c).type)
+    ]
+    for col, typ in _int_column_types(table.to_batches(), columns).items():
+        i = table.schema.get_field_index(col)
+        table = table.set_column(i, col, table.column(i).cast(typ))
+    return table
+
+
+def _column_types(
+    schema: Optional[Dict[str, str]], ints_as_text: bool = False
+) -> Dict[str, pa.DataType]:
+    """Arrow parse types for the schema's columns, optionally reading ints as text."""
+    return {
+        col: pa.string() if ints_as_text and typ.startswith("int") else ARROW_TYPES[typ]
+        for col, typ in (schema or {}).items()
+    }
+
+
+# Arrow text as pandas' Arrow-backed string dtype (not object), on any pandas
+_STRING_DTYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}
+
+
+def to_pandas(table: pa.Table) -> pd.DataFrame:
+    """Convert an Arrow table to pandas, keeping text columns Arrow-backed."""
+    # split_blocks keeps one block per column (no consolidation copy) and
+    # self_destruct frees each Arrow column as soon as it has been converted
+    return table.to_pandas(
+        split_blocks=True, self_destruct=True, types_mapper=_STRING_DTYPES.get
+    )
+
+
+def read_csv_table(path: Path, schema: Optional[Dict[str, str]] = None) -> pa.Table:
+    """Read a CSV into an Arrow table, typing (and downcasting) the schema's columns."""
     log.debug("Reading CSV: %s", path)
-    return pd.read_csv(path, **kwargs)
+
+    def parse(ints_as_text: bool) -> pa.Table:
+        return pacsv.read_csv(
+            path,
+            # 32 MiB blocks, parsed in parallel on Arrow's thread pool
+            read_options=pacsv.ReadOptions(block_size=32 << 20, use_threads=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types=_column_types(schema, ints_as_text)
+            ),
+        )
+
+    try:
+        try:
+            table = parse(ints_as_text=False)
+        except pa.ArrowInvalid:
+            table = parse(ints_as_text=True)
+    except pa.ArrowInvalid as exc:
+        raise ValidationError(f"Failed to parse {Path(path).name}: {exc}") from exc
+    return downcast_ints(table, schema)
+
+
+def read_csv(path: Path, schema: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Same as read_csv_table, converted to a pandas DataFrame."""
+    return to_pandas(read_csv_table(path, schema))
+
+
+def scan_csv_batches(
+    paths: List[Path],
+    schema: Optional[Dict[str, str]] = None,
+    source_column: Optional[str] = "_source",
+    row_filter: Optional[ds.Expression] = None,
+    ints_as_text: bool = False,
+) -> Tuple[pa.Schema, Iterator[pa.RecordBatch]]:
+    """
+    Scan CSVs as one dataset; returns the schema and a lazy RecordBatch iterator.
+
+    Rows are tagged with their file name in source_column (None leaves it out).
+    """
+    log.debug("Scanning %d CSV files", len(paths))
+    fmt = ds.CsvFileFormat(
+        read_options=pacsv.ReadOptions(block_size=32 << 20, use_threads=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types=_column_types(schema, ints_as_text)
+        ),
+    )
+    try:
+        dataset = ds.dataset([str(p) for p in paths], format=fmt)
+    except pa.ArrowInvalid as exc:
+        raise ValidationError(f"Failed to parse CSV files: {exc}") from exc
+    out_schema = dataset.schema
+    if source_column is not None:
+        out_schema = out_schema.append(
+            pa.field(source_column, pa.dictionary(pa.int32(), pa.string()))
+        )
+
+    def batches() -> Iterator[pa.RecordBatch]:
+        scanner = dataset.scanner(filter=row_filter, use_threads=True)
+        try:
+            for tagged in scanner.scan_batches():
+                batch = tagged.record_batch
+                if source_column is None:
+                    yield batch
+                    continue
+                source = pa.DictionaryArray.from_arrays(
+                    pa.array(np.zeros(batch.num_rows, dtype=np.int32)),
+                    pa.array([Path(tagged.fragment.path).name]),
+                )
+                yield pa.RecordBatch.from_arrays(
+                    batch.columns + [source], schema=out_schema
+                )
+        except pa.ArrowInvalid as exc:
+            raise ValidationError(f"Failed to parse CSV files: {exc}") from exc
+
+    return out_schema, batches()
 
 
-def write_parquet(df: pd.DataFrame, path: Path) -> None:
+def read_csv_files(
+    paths: List[Path],
+    schema: Optional[Dict[str, str]] = None,
+    source_column: Optional[str] = "_source",
+    row_filter: Optional[ds.Expression] = None,
+) -> pa.Table:
+    """Same as scan_csv_batches, collected into one table with ints downcast."""
+    try:
+        out_schema, batches = scan_csv_batches(paths, schema, source_column, row_filter)
+        table = pa.Table.from_batches(list(batches), schema=out_schema)
+    except ValidationError:
+        out_schema, batches = scan_csv_batches(
+            paths, schema, source_column, row_filter, ints_as_text=True
+        )
+        table = pa.Table.from_batches(list(batches), schema=out_schema)
+    return downcast_ints(table, schema)
+
+
+# repeating text columns that get Parquet dictionary encoding
+DICTIONARY_COLUMNS = ("category", "product_name", "order_status", "warehouse_id")
+
+
+def _parquet_options(schema: pa.Schema) -> dict:
+    """Writer options shared by the plain and the grouped Parquet write."""
+    return {
+        "compression": "zstd",
+        "compression_level": 3,
+        "use_dictionary": [c for c in DICTIONARY_COLUMNS if c in schema.names],
+        "write_statistics": True,
+    }
+
+
+def _split_by(table: pa.Table, group_by: str) -> Iterator[Tuple[object, pa.Table]]:
+    """(value, rows) for every distinct group_by value in `table`; None for nulls."""
+    codes, uniques = pd.factorize(table.column(group_by).to_pandas())
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    table = table.take(order)
+    bounds = (np.flatnonzero(np.diff(codes)) + 1).tolist()
+    for start, stop in zip([0] + bounds, bounds + [len(table)]):
+        code = codes[start]
+        yield (None if code < 0 else uniques[code]), table.slice(start, stop - start)
+
+
+def write_parquet_batches(
+    tables: Iterable[pa.Table],
+    path: Path,
+    schema: pa.Schema,
+    group_by: Optional[str] = None,
+    row_group_size: int = 256 * 1024,
+) -> int:
+    """Stream tables into one zstd Parquet file at `path`; returns rows written."""
     path.parent.mkdir(parents=True, exist_ok=True)
     log.debug("Writing Parquet: %s", path)
-    df.to_parquet(path, index=False)
+    # stream into a temp file and move it into place only once complete, so
+    # a failure halfway through (e.g. a bad input file) leaves nothing behind
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    pending: Dict[object, List[pa.Table]] = {}
+    rows = 0
+
+    def flush(writer: pq.ParquetWriter, key: object, final: bool) -> None:
+        buffered = pa.concat_tables(pending.pop(key))
+        # write whole row groups now; carry the remainder unless finishing
+        full = len(buffered) if final else len(buffered) - len(buffered) % row_group_size
+        if full:
+            writer.write_table(buffered.slice(0, full), row_group_size=row_group_size)
+        if full < len(buffered):
+            pending[key] = [buffered.slice(full)]
+
+    try:
+        with pq.ParquetWriter(tmp, schema, **_parquet_options(schema)) as writer:
+            for table in tables:
+                if table.num_rows == 0:
+                    continue  # e.g. a batch the filters emptied: no empty row groups
+                rows += table.num_rows
+                parts = [(None, table)] if group_by is None else _split_by(table, group_by)
+                for key, part in parts:
+                    pending.setdefault(key, []).append(part)
+                    if sum(t.num_rows for t in pending[key]) >= row_group_size:
+                        flush(writer, key, final=False)
+            # remaining groups in value order, missing values last
+            for key in sorted(pending, key=lambda k: (k is None, "" if k is None else k)):
+                flush(writer, key, final=True)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
+    tmp.replace(path)
+    return rows
+
+
+def write_parquet(
+    df: pd.DataFrame,
+    path: Path,
+    group_by: Optional[str] = None,
+    row_group_size: int = 256 * 1024,
+) -> None:
+    """Write a DataFrame to a single Parquet file (see write_parquet_batches)."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    write_parquet_batches([table], path, table.schema, group_by, row_group_size)
+
+
+def _sqlite_columns(df: pd.DataFrame) -> List[list]:
+    """Column values as plain Python objects sqlite3 can bind (None for nulls)."""
+    cols = []
+    for _, s in df.items():
+        if pd.api.types.is_datetime64_any_dtype(s):
+            # same text layout pandas.to_sql uses for timestamps
+            s = s.dt.strftime("%Y-%m-%d %H:%M:%S")
+        cols.append(s.astype(object).where(s.notna(), None).tolist())
+    return cols
+
+
+def _sqlite_type(dtype) -> str:
+    """Column type for a pandas dtype — the same ones to_sql declares."""
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP"
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def bulk_insert(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    table: str,
+    if_exists: str = "append",
+    chunk_size: int = 100_000,
+    extra_columns: Iterable[str] = (),
+) -> None:
+    """
+    Load a DataFrame into `table` in one transaction; `conn` must have none open.
+
+    if_exists is "append", "replace" or "fail", as for to_sql. extra_columns
+    are column definitions added after the frame's own (e.g. generated ones).
+    """
+    if if_exists not in ("replace", "append", "fail"):
+        raise ValueError(f"unsupported if_exists value: {if_exists}")
+
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+
+    columns = [f'"{c}" {_sqlite_type(s.dtype)}' for c, s in df.items()]
+    columns += list(extra_columns)
+    body = ",\n  ".join(columns)
+    ddl = f'CREATE TABLE IF NOT EXISTS "{table}" (\n  {body}\n)'
+    # bind by name: an appended frame may list its columns in another order
+    col_names = ", ".join(f'"{c}"' for c in df.columns)
+    placeholders = ", ".join("?" * len(df.columns))
+
+    conn.execute("BEGIN")
+    try:
+        if if_exists == "replace":
+            conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        elif if_exists == "fail" and conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone():
+            raise ValueError(f"Table '{table}' already exists.")
+        conn.execute(ddl)
+        sql = f'INSERT INTO "{table}" ({col_names}) VALUES ({placeholders})'
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            conn.executemany(sql, zip(*_sqlite_columns(chunk)))
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
 
 
 def write_sqlite(
@@ -25,11 +357,13 @@ def write_sqlite(
     """
     Write a DataFrame to a SQLite DB.
 
-    if_exists should be a string accepted by pandas.DataFrame.to_sql,
-    typically "replace" or "append".
+    if_exists is as for bulk_insert: "append", "replace" or "fail".
     """
     db_path.parent.mkdir(parents=True, exist_ok=True)
     mode = if_exists
     log.debug("Writing to SQLite: %s → %s (%s)", db_path, table, mode)
-    with sqlite3.connect(db_path) as conn:
-        df.to_sql(table, conn, if_exists=mode, index=False)
+    conn = sqlite3.connect(db_path)
+    try:
+        bulk_insert(conn, df, table, if_exists=mode)
+    finally:
+        conn.close()
@@ -1,17 +1,28 @@
+import sqlite3
+from datetime import datetime
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
 from quickshop_etl.etl import (
+    INVENTORY_SCHEMA,
+    ORDERS_SCHEMA,
+    PRODUCTS_SCHEMA,
+    _filter_files_by_filename_date,
     enrich_orders,
+    index_by_product_id,
+    load_reference,
     run_etl,
     validate_inventory,
     validate_orders,
     validate_products,
 )
 from quickshop_etl.exception import ETLError, ValidationError
+from quickshop_etl.io import bulk_insert, read_csv, write_parquet_batches
 
 # --- Sample DataFrames for testing ---
 PRODUCTS_SAMPLE = pd.DataFrame(
@@ -56,8 +67,8 @@ def test_validate_products_success():
         "category",
         "price",
     }
-    # product_id should be pandas nullable Int64
-    assert df["product_id"].dtype.name == "Int64"
+    # product_id is the join key: plain int32 everywhere
+    assert df["product_id"].dtype == np.int32
     # price should be a float dtype
     assert pd.api.types.is_float_dtype(df["price"])
 
@@ -70,7 +81,7 @@ def test_validate_inventory_success():
         "stock_on_hand",
         "last_restock_date",
     }
-    assert df["stock_on_hand"].dtype.name == "Int64"
+    assert pd.api.types.is_integer_dtype(df["stock_on_hand"])
     assert pd.api.types.is_datetime64_any_dtype(df["last_restock_date"])
 
 
@@ -86,7 +97,65 @@ def test_validate_orders_success():
         "order_status",
     }
     assert set(df.columns) >= expected_cols
-    assert df["order_id"].dtype.name == "Int64"
+    assert pd.api.types.is_integer_dtype(df["order_id"])
+    assert df["qty"].dtype == np.int16
+
+
+def test_validate_int_with_missing_values_stays_nullable():
+    df = validate_inventory(INVENTORY_SAMPLE.assign(stock_on_hand=[120, None]))
+    assert df["stock_on_hand"].dtype.name == "Int64"
+    assert df["stock_on_hand"].isna().sum() == 1
+
+
+def test_validate_orders_parses_numeric_strings():
+    raw = ORDERS_SAMPLE.astype(str)
+    df = validate_orders(raw)
+    assert df["product_id"].tolist() == [1001, 1002]
+    assert pd.api.types.is_integer_dtype(df["qty"])
+    assert df["unit_price"].tolist() == [19.99, 79.99]
+
+
+def test_validate_numeric_strings_with_non_default_index():
+    raw = ORDERS_SAMPLE.astype(str).set_axis([10, 11])
+    df = validate_orders(raw)
+    assert df.index.tolist() == [10, 11]
+    assert df["product_id"].tolist() == [1001, 1002]
+    assert df["unit_price"].tolist() == [19.99, 79.99]
+    # a row subset keeps its original label
+    assert validate_orders(raw.iloc[[1]])["order_id"].tolist() == [60002]
+
+
+def test_validate_already_typed_frame_is_returned_unchanged():
+    df = validate_orders(ORDERS_SAMPLE)
+    assert validate_orders(df) is df
+
+
+def test_validate_shares_columns_it_does_not_coerce():
+    raw = ORDERS_SAMPLE.assign(qty=["2", "1"])
+    df = validate_orders(raw)
+    assert df["qty"].tolist() == [2, 1]
+    assert raw["qty"].tolist() == ["2", "1"]
+    assert np.shares_memory(df["unit_price"].to_numpy(), raw["unit_price"].to_numpy())
+
+
+def test_validate_typed_read_is_returned_unchanged(tmp_path):
+    samples = [
+        (ORDERS_SAMPLE, ORDERS_SCHEMA, validate_orders),
+        (PRODUCTS_SAMPLE, PRODUCTS_SCHEMA, validate_products),
+        (INVENTORY_SAMPLE, INVENTORY_SCHEMA, validate_inventory),
+    ]
+    for sample, schema, validate in samples:
+        path = tmp_path / "sample.csv"
+        sample.to_csv(path, index=False)
+        df = read_csv(path, schema)
+        assert validate(df) is df
+    # ints come back at the validated width
+    assert df["stock_on_hand"].dtype == np.int8
+
+
+def test_validate_fractional_int_raises_validation_error():
+    with pytest.raises(ValidationError):
+        validate_orders(ORDERS_SAMPLE.assign(qty=[2.5, 1]))
 
 
 def test_enrich_orders_computation_and_filtering():
@@ -111,6 +180,81 @@ def test_enrich_orders_computation_and_filtering():
     )
 
 
+def test_enrich_orders_accepts_prebuilt_lookups():
+    orders = validate_orders(ORDERS_SAMPLE)
+    products = validate_products(PRODUCTS_SAMPLE)
+    inventory = validate_inventory(INVENTORY_SAMPLE)
+
+    plain = enrich_orders(orders, products, inventory)
+    indexed = enrich_orders(
+        orders, index_by_product_id(products), index_by_product_id(inventory)
+    )
+    pd.testing.assert_frame_equal(plain, indexed)
+
+
+def test_enrich_orders_takes_first_row_of_indexed_lookup_with_repeated_ids():
+    orders = validate_orders(ORDERS_SAMPLE)
+    products = validate_products(PRODUCTS_SAMPLE)
+    repeated = pd.concat(
+        [products, products.iloc[:1].assign(product_name="dupe")], ignore_index=True
+    ).set_index("product_id")
+    enriched = enrich_orders(orders, repeated, validate_inventory(INVENTORY_SAMPLE))
+    assert enriched["product_name"].tolist() == ["Classic Tee"]
+
+
+def test_enrich_orders_never_joins_a_null_product_id():
+    # a null order product_id matches nothing, even a null key in the catalog
+    orders = validate_orders(
+        pd.concat(
+            [ORDERS_SAMPLE, ORDERS_SAMPLE.iloc[:1].assign(order_id=60003)],
+            ignore_index=True,
+        ).assign(product_id=[1001, 1002, None])
+    )
+    products = validate_products(
+        pd.concat(
+            [PRODUCTS_SAMPLE, PRODUCTS_SAMPLE.iloc[:1].assign(product_name="ghost")],
+            ignore_index=True,
+        ).assign(product_id=[1001, 1002, None])
+    )
+    enriched = enrich_orders(orders, products, validate_inventory(INVENTORY_SAMPLE))
+
+    assert enriched["product_name"].isna().tolist() == [False, True]
+    assert enriched["stock_on_hand"].isna().tolist() == [False, True]
+
+
+def test_filter_files_by_filename_date():
+    files = [
+        Path("orders_20251022.csv"),
+        Path("orders_20251023.csv"),
+        Path("orders_20251399.csv"),
+        Path("orders_extra.csv"),
+        Path("orders_20251026.csv"),
+    ]
+    kept = _filter_files_by_filename_date(
+        files, datetime(2025, 10, 23), datetime(2025, 10, 25)
+    )
+    # in-window dates and undated files are kept; invalid tokens are skipped
+    assert [p.name for p in kept] == ["orders_20251023.csv", "orders_extra.csv"]
+
+    # impossible days are skipped too; leap-day Februaries are real dates
+    files = [Path(f"orders_{d}.csv") for d in ("20250230", "20250231", "20240229", "20250229")]
+    kept = _filter_files_by_filename_date(files, datetime(2024, 2, 1), datetime(2025, 3, 31))
+    assert [p.name for p in kept] == ["orders_20240229.csv"]
+
+
+def test_load_reference_reuses_cache_until_file_changes(tmp_path):
+    path = tmp_path / "products.csv"
+    PRODUCTS_SAMPLE.to_csv(path, index=False)
+
+    first = load_reference(path, "products")
+    first.loc[0, "price"] = 0.0  # must not leak into the cache
+    second = load_reference(path, "products")
+    assert second["price"].tolist() == [19.99, 79.99]
+
+    PRODUCTS_SAMPLE.assign(price=[1.0, 2.0]).to_csv(path, index=False)
+    assert load_reference(path, "products")["price"].tolist() == [1.0, 2.0]
+
+
 def test_run_etl_creates_parquet(tmp_path):
     # Prepare input files in a temporary directory
     data_dir = tmp_path / "data"
@@ -146,6 +290,118 @@ def test_run_etl_creates_parquet(tmp_path):
     assert mismatches.shape[0] == 0
 
 
+def test_run_etl_creates_sqlite(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    PRODUCTS_SAMPLE.to_csv(data_dir / "products.csv", index=False)
+    INVENTORY_SAMPLE.to_csv(data_dir / "inventory.csv", index=False)
+    ORDERS_SAMPLE.to_csv(data_dir / "orders_20251023.csv", index=False)
+
+    db_path = run_etl(
+        input_dir=data_dir, output_dir=tmp_path / "output", output_format="sqlite"
+    )
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT order_id, order_date, product_name, order_total FROM orders"
+        ).fetchall()
+        n_products = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    assert rows == [(60001, "2025-10-23 00:00:00", "Classic Tee", 39.98)]
+    assert n_products == 2
+    # a plain rollback-journal DB: no WAL mode, no -wal/-shm side files
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert sorted(p.name for p in db_path.parent.iterdir()) == [db_path.name]
+
+
+def test_run_etl_parquet_and_sqlite_agree(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    PRODUCTS_SAMPLE.to_csv(data_dir / "products.csv", index=False)
+    INVENTORY_SAMPLE.to_csv(data_dir / "inventory.csv", index=False)
+    ORDERS_SAMPLE.to_csv(data_dir / "orders_20251023.csv", index=False)
+    # a second file, so the Parquet output is streamed from several batches
+    ORDERS_SAMPLE.assign(
+        order_id=[60003, 60004], qty=[300, 1], order_status="completed"
+    ).to_csv(data_dir / "orders_20251024.csv", index=False)
+
+    parquet_path = run_etl(input_dir=data_dir, output_dir=tmp_path / "pq")
+    db_path = run_etl(
+        input_dir=data_dir, output_dir=tmp_path / "db", output_format="sqlite"
+    )
+
+    # the fixed ORDERS_SCHEMA width, as validation gives the SQLite frame
+    assert pq.read_schema(parquet_path).field("qty").type == pa.int16()
+    # Parquet rows are grouped by category, so compare in order_id order
+    parquet = pd.read_parquet(parquet_path).sort_values("order_id", ignore_index=True)
+    parquet["order_date"] = parquet["order_date"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(db_path) as conn:
+        sqlite = pd.read_sql_query("SELECT * FROM orders ORDER BY order_id", conn)
+    assert parquet["order_id"].tolist() == [60001, 60003, 60004]
+    pd.testing.assert_frame_equal(
+        parquet.astype(object), sqlite.astype(object), check_dtype=False
+    )
+
+
+def test_run_etl_parquet_first_file_without_completed_orders(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    PRODUCTS_SAMPLE.to_csv(data_dir / "products.csv", index=False)
+    INVENTORY_SAMPLE.to_csv(data_dir / "inventory.csv", index=False)
+    ORDERS_SAMPLE.assign(order_status="cancelled").to_csv(
+        data_dir / "orders_20251023.csv", index=False
+    )
+    ORDERS_SAMPLE.to_csv(data_dir / "orders_20251024.csv", index=False)
+
+    df = pd.read_parquet(run_etl(input_dir=data_dir, output_dir=tmp_path / "out"))
+    assert df["order_id"].tolist() == [60001]
+    assert df["category"].tolist() == ["Apparel"]
+
+
+def test_run_etl_keep_source_toggles_source_column(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    PRODUCTS_SAMPLE.to_csv(data_dir / "products.csv", index=False)
+    INVENTORY_SAMPLE.to_csv(data_dir / "inventory.csv", index=False)
+    ORDERS_SAMPLE.to_csv(data_dir / "orders_20251023.csv", index=False)
+
+    tagged = pd.read_parquet(run_etl(input_dir=data_dir, output_dir=tmp_path / "a"))
+    assert tagged["_source"].tolist() == ["orders_20251023.csv"]
+
+    untagged = run_etl(input_dir=data_dir, output_dir=tmp_path / "b", keep_source=False)
+    assert "_source" not in pd.read_parquet(untagged).columns
+    db_path = run_etl(
+        input_dir=data_dir,
+        output_dir=tmp_path / "c",
+        output_format="sqlite",
+        keep_source=False,
+    )
+    with sqlite3.connect(db_path) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(orders)")]
+    assert "_source" not in columns
+
+
+def test_run_etl_filters_rows_by_order_date(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    PRODUCTS_SAMPLE.to_csv(data_dir / "products.csv", index=False)
+    INVENTORY_SAMPLE.to_csv(data_dir / "inventory.csv", index=False)
+    # undated filename: only the row-level date filter can drop rows
+    ORDERS_SAMPLE.assign(
+        order_date=["2025-10-22", "2025-10-23"], order_status="completed"
+    ).to_csv(data_dir / "orders_backfill.csv", index=False)
+
+    result_path = run_etl(
+        input_dir=data_dir,
+        output_dir=tmp_path / "output",
+        start_date=datetime(2025, 10, 23),
+        end_date=datetime(2025, 10, 23),
+    )
+
+    df = pd.read_parquet(result_path)
+    assert df["order_id"].tolist() == [60002]
+
+
 def test_run_etl_missing_files_raises(tmp_path):
     # If products or inventory are missing, ETL should raise ETLError
     data_dir = tmp_path / "data"
@@ -160,3 +416,111 @@ def test_invalid_schema_raises_validation_error():
     bad_products = pd.DataFrame({"wrong_col": [1, 2]})
     with pytest.raises(ValidationError):
         validate_products(bad_products)
+
+
+def test_run_etl_bad_orders_value_raises_validation_error(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    PRODUCTS_SAMPLE.to_csv(data_dir / "products.csv", index=False)
+    INVENTORY_SAMPLE.to_csv(data_dir / "inventory.csv", index=False)
+    ORDERS_SAMPLE.assign(qty=["two", "1"]).to_csv(
+        data_dir / "orders_20251023.csv", index=False
+    )
+
+    with pytest.raises(ValidationError):
+        run_etl(input_dir=data_dir, output_dir=tmp_path / "output")
+
+
+def test_run_etl_accepts_ints_written_as_floats(tmp_path):
+    # pandas writes an int column with a missing value as 2.0, 1.0, ...
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    PRODUCTS_SAMPLE.to_csv(data_dir / "products.csv", index=False)
+    INVENTORY_SAMPLE.assign(stock_on_hand=[120.0, 80.0]).to_csv(
+        data_dir / "inventory.csv", index=False
+    )
+    ORDERS_SAMPLE.to_csv(data_dir / "orders_20251023.csv", index=False)
+    ORDERS_SAMPLE.assign(order_id=[60003, 60004], qty=[2.0, 1.0]).to_csv(
+        data_dir / "orders_20251024.csv", index=False
+    )
+
+    df = pd.read_parquet(run_etl(input_dir=data_dir, output_dir=tmp_path / "pq"))
+    assert sorted(df["qty"].tolist()) == [2, 2]
+    assert df["qty"].dtype == np.int16
+    assert df["stock_on_hand"].tolist() == [120, 120]
+
+    db_path = run_etl(
+        input_dir=data_dir, output_dir=tmp_path / "db", output_format="sqlite"
+    )
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT order_id, qty FROM orders").fetchall()
+    assert rows == [(60001, 2), (60003, 2)]
+
+
+def test_run_etl_bad_later_orders_file_leaves_no_parquet(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    PRODUCTS_SAMPLE.to_csv(data_dir / "products.csv", index=False)
+    INVENTORY_SAMPLE.to_csv(data_dir / "inventory.csv", index=False)
+    ORDERS_SAMPLE.to_csv(data_dir / "orders_20251023.csv", index=False)
+    ORDERS_SAMPLE.assign(qty=["two", "1"]).to_csv(
+        data_dir / "orders_20251024.csv", index=False
+    )
+    out_dir = tmp_path / "output"
+
+    with pytest.raises(ValidationError):
+        run_etl(
+            input_dir=data_dir,
+            output_dir=out_dir,
+            start_date=datetime(2025, 10, 23),
+            end_date=datetime(2025, 10, 24),
+        )
+    assert list(out_dir.iterdir()) == []
+
+
+def test_write_parquet_batches_fills_row_groups_per_group(tmp_path):
+    cats = pd.Categorical(["a", "b", "a", None], categories=["a", "b"])
+    table = pa.table({"category": pa.array(cats), "n": [1, 2, 3, 4]})
+    # many small batches plus empty ones, as a multi-day backfill yields
+    tables = [table] * 30 + [table.slice(0, 0)] * 5
+    path = tmp_path / "out.parquet"
+
+    rows = write_parquet_batches(tables, path, table.schema, group_by="category")
+
+    meta = pq.ParquetFile(path).metadata
+    assert rows == meta.num_rows == 120
+    groups = [meta.row_group(i) for i in range(meta.num_row_groups)]
+    # one row group per value (nulls last), none of them empty
+    assert [g.num_rows for g in groups] == [60, 30, 30]
+    stats = [g.column(0).statistics for g in groups]
+    assert [(s.min, s.max) for s in stats[:2]] == [("a", "a"), ("b", "b")]
+
+    write_parquet_batches(
+        tables, path, table.schema, group_by="category", row_group_size=25
+    )
+    meta = pq.ParquetFile(path).metadata
+    sizes = [meta.row_group(i).num_rows for i in range(meta.num_row_groups)]
+    assert sum(sizes) == 120 and max(sizes) == 25
+
+
+def test_bulk_insert_append_matches_columns_by_name():
+    conn = sqlite3.connect(":memory:")
+    bulk_insert(conn, pd.DataFrame({"a": [1], "b": ["x"]}), "t")
+    bulk_insert(conn, pd.DataFrame({"b": ["y"], "a": [2]}), "t")
+    rows = conn.execute("SELECT a, b FROM t ORDER BY a").fetchall()
+    conn.close()
+    assert rows == [(1, "x"), (2, "y")]
+
+
+def test_bulk_insert_extra_columns_and_if_exists_fail():
+    conn = sqlite3.connect(":memory:")
+    df = pd.DataFrame({"n": [5, 50]})
+    big = "big INTEGER GENERATED ALWAYS AS (n > 10)"
+    bulk_insert(conn, df, "t", extra_columns=[big])
+    rows = conn.execute("SELECT n, big FROM t ORDER BY n").fetchall()
+    assert rows == [(5, 0), (50, 1)]
+    with pytest.raises(ValueError):
+        bulk_insert(conn, df, "t", if_exists="fail")
+    bulk_insert(conn, df, "u", if_exists="fail")
+    assert conn.execute("SELECT COUNT(*) FROM u").fetchone()[0] == 2
+    conn.close()